@@ -1,29 +1,110 @@
 from flask import Flask, request, jsonify, Response, send_file
+from flask.json.provider import JSONProvider
 from flask_cors import CORS
+import orjson
 import yt_dlp
 import os
-import json
 import re
-import tempfile
-import shutil
+import hashlib
+import heapq
+import queue
 import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from datetime import datetime
+from functools import lru_cache
+from types import MappingProxyType
+from urllib.parse import parse_qs, urlsplit
 import time
 import random
 
+class OrjsonProvider(JSONProvider):
+    """JSON provider backed by orjson, used by jsonify and request.json"""
+    
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj).decode()
+    
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+    
+    def response(self, *args, **kwargs):
+        # Send orjson's bytes as-is instead of round-tripping through str
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(orjson.dumps(obj), mimetype="application/json")
+
 app = Flask(__name__)
-CORS(app)  # Enable CORS for all routes
+app.json = OrjsonProvider(app)
+CORS(app, expose_headers=['ETag'])  # Enable CORS for all routes; let browser JS read /info ETags
 
 # Configuration
 app.config['MAX_CONTENT_LENGTH'] = 100 * 1024 * 1024  # 100MB max file size
 app.config['DOWNLOAD_FOLDER'] = 'downloads'
-os.makedirs(app.config['DOWNLOAD_FOLDER'], exist_ok=True)
+app.config['MAX_CONCURRENT_DOWNLOADS'] = 4
+app.config['DOWNLOAD_EXPIRY'] = 300  # seconds a finished download is kept
+app.config['MAX_TRACKED_DOWNLOADS'] = 1024
+# Let a front-end proxy (Apache mod_xsendfile, lighttpd, ...) stream files
+# straight from disk; only enable when one is actually in front of the app
+app.config['USE_X_SENDFILE'] = os.environ.get('USE_X_SENDFILE', '').lower() in ('1', 'true', 'yes')
+# Downloads in progress live inside the downloads folder so the finished
+# file can be renamed into place rather than copied
+app.config['TEMP_FOLDER'] = os.path.join(app.config['DOWNLOAD_FOLDER'], '.tmp')
+os.makedirs(app.config['TEMP_FOLDER'], exist_ok=True)
 
-# Store active downloads for progress tracking
+# Store active downloads for progress tracking. Request handlers, download
+# workers and the cleanup thread all touch it, so access goes through the lock.
 active_downloads = {}
+downloads_lock = threading.RLock()
+
+# Minimum seconds between progress updates while downloading (5 per second)
+PROGRESS_UPDATE_INTERVAL = 0.2
+
+# Statuses after which a download's progress no longer changes
+FINAL_STATUSES = frozenset(("completed", "error", "cancelled", "not_found"))
+
+# Downloads run on a shared worker pool; extra requests wait as "pending"
+download_executor = ThreadPoolExecutor(
+    max_workers=app.config['MAX_CONCURRENT_DOWNLOADS'],
+    thread_name_prefix='download'
+)
+
+# Cache extracted video info by video id so repeated /info and /download
+# requests for the same video skip the yt-dlp round trips
+INFO_CACHE_TTL = 600  # seconds
+INFO_CACHE_MAX_SIZE = 256
+INFO_MAX_AGE = 300  # seconds clients may reuse an /info response
+info_cache = {}
+info_cache_lock = threading.Lock()
+
+# Large info fields that neither /info nor the download step use; dropped
+# before caching so each entry stays small
+_UNCACHED_INFO_KEYS = frozenset((
+    'automatic_captions', 'subtitles', 'requested_subtitles', 'thumbnails',
+    'heatmap', 'chapters', 'description', 'tags', 'categories',
+))
+
+# Extensions of finished video files in the temp folder
+_VIDEO_EXTS = frozenset(('.mp4', '.mkv', '.webm'))
+
+# Hosts and paths accepted as links to a single YouTube video
+_YT_HOSTS = frozenset((
+    'youtube.com', 'www.youtube.com', 'm.youtube.com', 'music.youtube.com',
+    'youtu.be', 'youtube-nocookie.com', 'www.youtube-nocookie.com',
+))
+_VIDEO_ID_PATHS = ('/shorts/', '/embed/', '/live/', '/v/')
+
+# Precompiled patterns used on every request
+_VIDEO_ID_RE = re.compile(r'[\w-]{11}')
+_DIGITS_RE = re.compile(r'\d+')
+_UNSAFE_RE = re.compile(r'[^\w\s-]')
+_WS_RE = re.compile(r'[-\s]+')
 
 class DownloadProgress:
-    def __init__(self):
+    __slots__ = (
+        'download_id', 'status', 'progress', 'message', 'current_step', 'file_path',
+        'error', 'title', 'quality', 'size', 'start_time', 'info', 'changed', 'snapshot',
+    )
+    
+    def __init__(self, download_id):
+        self.download_id = download_id
         self.status = "pending"
         self.progress = 0
         self.message = ""
@@ -34,100 +115,355 @@ class DownloadProgress:
         self.quality = ""
         self.size = "0 MB"
         self.start_time = None
+        self.info = None
+        # Signalled on every update; shares the downloads lock
+        self.changed = threading.Condition(downloads_lock)
+        self.snapshot = self.to_dict()
+    
+    def to_dict(self):
+        """Return the progress fields reported to clients"""
+        progress_data = {
+            "status": self.status,
+            "progress": self.progress,
+            "message": self.message,
+            "current_step": self.current_step,
+            "title": self.title,
+            "size": self.size,
+            "error": self.error,
+            "download_id": self.download_id
+        }
+        
+        if self.status in ["completed", "error"]:
+            progress_data["file_path"] = self.file_path
+        
+        return progress_data
+
+_UA_POOL = (
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36',
+    'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:109.0) Gecko/20100101 Firefox/121.0',
+    'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+)
+
+# Request headers other than the User-Agent, shared read-only by every call
+_INFO_HEADERS = MappingProxyType({
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.9',
+    'Accept-Encoding': 'gzip, deflate, br',
+    'DNT': '1',
+    'Connection': 'keep-alive',
+    'Upgrade-Insecure-Requests': '1',
+})
+_DOWNLOAD_HEADERS = MappingProxyType({
+    'Accept': '*/*',
+    'Accept-Language': 'en-US,en;q=0.9',
+    'Accept-Encoding': 'gzip, deflate, br',
+    'Connection': 'keep-alive',
+})
 
 def get_random_user_agent():
     """Return random user agent"""
-    user_agents = [
-        'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-        'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36',
-        'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-        'Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:109.0) Gecko/20100101 Firefox/121.0',
-        'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-    ]
-    return random.choice(user_agents)
+    return random.choice(_UA_POOL)
+
+def build_headers(base_headers):
+    """Return request headers with a random user agent"""
+    return {'User-Agent': get_random_user_agent(), **base_headers}
+
+_SIZE_UNITS = ('B', 'KB', 'MB', 'GB', 'TB')
 
 def format_size(bytes_size):
     """Convert bytes to human readable format"""
     if not bytes_size:
         return "0 B"
-    for unit in ['B', 'KB', 'MB', 'GB']:
-        if bytes_size < 1024.0:
-            return f"{bytes_size:.2f} {unit}"
-        bytes_size /= 1024.0
-    return f"{bytes_size:.2f} TB"
+    # Each unit is 2**10 times the last, so the bit length picks the unit
+    unit = min(max(int(bytes_size).bit_length() - 1, 0) // 10, len(_SIZE_UNITS) - 1)
+    return f"{bytes_size / (1 << (10 * unit)):.2f} {_SIZE_UNITS[unit]}"
 
-def get_video_info_with_retry(url):
-    """Get video information with retry logic"""
-    # Try different yt-dlp configurations
-    configs_to_try = [
-        {
-            'extractor_args': {
-                'youtube': {
-                    'player_client': ['android', 'ios', 'web'],
-                    'skip': ['configs', 'hls', 'dash'],
-                    'throttled': False,
-                }
-            },
-            'youtube_include_dash_manifest': False,
-            'youtube_include_hls_manifest': False,
+# Only load the YouTube extractors instead of every site yt-dlp supports
+ALLOWED_EXTRACTORS = ['youtube', 'youtube:tab']
+
+# Seconds to wait on running configurations before starting the next one
+INFO_HEDGE_DELAY = 3
+
+# Extra attempts when every configuration is rate limited
+INFO_RATE_LIMIT_RETRIES = 3
+
+# yt-dlp configurations tried in order when fetching video info
+INFO_CONFIGS = [
+    {
+        'extractor_args': {
+            'youtube': {
+                'player_client': ['android', 'ios', 'web'],
+                'skip': ['configs', 'hls', 'dash'],
+                'throttled': False,
+            }
         },
-        {
-            'extractor_args': {
-                'youtube': {
-                    'player_client': 'android',
-                    'player_skip': ['configs'],
-                    'innertube_host': 'studio.youtube.com',
-                }
-            },
+        'youtube_include_dash_manifest': False,
+        'youtube_include_hls_manifest': False,
+    },
+    {
+        'extractor_args': {
+            'youtube': {
+                'player_client': 'android',
+                'player_skip': ['configs'],
+                'innertube_host': 'studio.youtube.com',
+            }
         },
-        {
-            'extractor_args': {
-                'youtube': {
-                    'player_client': ['ios', 'android_embed'],
-                    'skip': ['hls'],
-                }
-            },
+    },
+    {
+        'extractor_args': {
+            'youtube': {
+                'player_client': ['ios', 'android_embed'],
+                'skip': ['hls'],
+            }
+        },
+    }
+]
+
+def build_info_opts(config):
+    """Return yt-dlp options for fetching video info with a configuration"""
+    ydl_opts = {
+        'quiet': True,
+        'no_warnings': True,
+        'extract_flat': False,
+        'allowed_extractors': ALLOWED_EXTRACTORS,
+        'http_headers': build_headers(_INFO_HEADERS),
+        'geo_bypass': True,
+        'geo_bypass_country': 'US',
+        'retries': 10,
+        'fragment_retries': 10,
+        'skip_unavailable_fragments': True,
+        # Raise instead of returning None so failures (and 429s) are visible
+        'ignoreerrors': False,
+    }
+    
+    # Merge with current config
+    ydl_opts.update(config)
+    return ydl_opts
+
+# Idle YoutubeDL clients kept per configuration so HTTP connections are
+# reused across /info requests
+INFO_CLIENTS_PER_CONFIG = 4
+
+# YoutubeDL is not reentrant, so each extraction checks a client out of its
+# configuration's pool. Concurrent misses get a fresh client when the pool
+# is empty rather than waiting for one to be returned.
+YDL_POOL = [queue.LifoQueue(maxsize=INFO_CLIENTS_PER_CONFIG) for _ in INFO_CONFIGS]
+
+# Download options shared by every download, with anti-bot measures
+_DOWNLOAD_OPTS = MappingProxyType({
+    'quiet': True,
+    'no_warnings': True,
+    'merge_output_format': 'mp4',
+    'allowed_extractors': ALLOWED_EXTRACTORS,
+    
+    'extractor_args': {
+        'youtube': {
+            'player_client': ['android', 'ios'],
+            'skip': ['configs', 'hls', 'dash'],
+            'throttled': False,
         }
-    ]
+    },
     
-    for attempt, config in enumerate(configs_to_try):
+    'geo_bypass': True,
+    'geo_bypass_country': 'US',
+    
+    # Failed requests (including 429s) are retried with yt-dlp's
+    # backoff, so no fixed sleeps between requests
+    'retries': 15,
+    'fragment_retries': 15,
+    'skip_unavailable_fragments': True,
+    'ignoreerrors': True,
+    
+    'concurrent_fragment_downloads': 4,
+})
+
+@lru_cache(maxsize=256)
+def quality_sort_key(quality):
+    """Sort key for a format's quality label, highest first when reversed"""
+    # Labels repeat heavily ("720p", "640x360", ...), so results are memoized
+    quality = str(quality)
+    match = _DIGITS_RE.search(quality)
+    return (0 if 'p' in quality else 1, int(match.group()) if match else 0)
+
+def _extract_with_client(config_index, url, finished):
+    """Extract video info with a pooled client of one configuration"""
+    pool = YDL_POOL[config_index]
+    try:
+        ydl = pool.get_nowait()
+    except queue.Empty:
+        ydl = yt_dlp.YoutubeDL(build_info_opts(INFO_CONFIGS[config_index]))
+    
+    try:
+        # Another configuration already won the race; cancel_futures can't
+        # stop a call that has started, so skip the extraction here
+        if finished.is_set():
+            return None
+        return ydl.extract_info(url, download=False)
+    finally:
+        # Keep the client for the next request unless the pool is full
         try:
-            time.sleep(random.uniform(0.5, 2))  # Add delay between attempts
-            
-            ydl_opts = {
-                'quiet': True,
-                'no_warnings': True,
-                'extract_flat': False,
-                'http_headers': {
-                    'User-Agent': get_random_user_agent(),
-                    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
-                    'Accept-Language': 'en-US,en;q=0.9',
-                    'Accept-Encoding': 'gzip, deflate, br',
-                    'DNT': '1',
-                    'Connection': 'keep-alive',
-                    'Upgrade-Insecure-Requests': '1',
-                },
-                'geo_bypass': True,
-                'geo_bypass_country': 'US',
-                'retries': 10,
-                'fragment_retries': 10,
-                'skip_unavailable_fragments': True,
-                'ignoreerrors': True,
-            }
-            
-            # Merge with current config
-            ydl_opts.update(config)
-            
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                info = ydl.extract_info(url, download=False)
-                return info
-                
-        except Exception as e:
-            if attempt < len(configs_to_try) - 1:
-                print(f"Attempt {attempt + 1} failed, trying next configuration...")
-                continue
-            else:
-                raise e
+            pool.put_nowait(ydl)
+        except queue.Full:
+            ydl.close()
+
+def is_rate_limited(error):
+    """Whether a yt-dlp error was caused by YouTube rate limiting (HTTP 429)"""
+    return isinstance(error, yt_dlp.utils.DownloadError) and 'HTTP Error 429' in str(error)
+
+def _race_info_clients(url):
+    """Extract video info with hedged configurations, keeping the first success"""
+    executor = ThreadPoolExecutor(max_workers=len(INFO_CONFIGS))
+    waiting = list(range(len(INFO_CONFIGS)))
+    pending = set()
+    error = None
+    # Set once this call returns, telling hedged calls still starting to stop
+    finished = threading.Event()
+    
+    try:
+        while waiting or pending:
+            # Start the next configuration right away on the first pass or
+            # after a failure, otherwise once the running ones are slow
+            if waiting:
+                pending.add(executor.submit(_extract_with_client, waiting.pop(0), url, finished))
+            done, pending = wait(
+                pending,
+                timeout=INFO_HEDGE_DELAY if waiting else None,
+                return_when=FIRST_COMPLETED
+            )
+            for future in done:
+                try:
+                    info = future.result()
+                except Exception as e:
+                    print(f"Configuration failed ({e}), trying the others...")
+                    # Report a rate limit over any other failure
+                    if not is_rate_limited(error):
+                        error = e
+                    continue
+                if info:
+                    return info
+    finally:
+        # Don't wait for the slower configurations
+        finished.set()
+        executor.shutdown(wait=False, cancel_futures=True)
+    
+    if error:
+        raise error
+    return None
+
+def get_video_info_with_retry(url):
+    """Get video information, backing off only when YouTube rate-limits us"""
+    for attempt in range(INFO_RATE_LIMIT_RETRIES + 1):
+        try:
+            return _race_info_clients(url)
+        except yt_dlp.utils.DownloadError as e:
+            if not is_rate_limited(e) or attempt == INFO_RATE_LIMIT_RETRIES:
+                raise
+            delay = 2 ** attempt + random.random()
+            print(f"Rate limited, retrying in {delay:.1f}s...")
+            time.sleep(delay)
+
+def extract_video_id(url):
+    """Return the 11-character video id of a YouTube URL, or None"""
+    try:
+        parts = urlsplit(url if '://' in url else 'https://' + url)
+    except ValueError:
+        return None
+    
+    host = parts.hostname
+    if host not in _YT_HOSTS:
+        return None
+    
+    # A bare youtu.be or /shorts/ link yields an empty id, rejected below
+    if host == 'youtu.be':
+        video_id = parts.path[1:].split('/', 1)[0]
+    elif parts.path == '/watch':
+        video_id = parse_qs(parts.query).get('v', [''])[0]
+    elif parts.path.startswith(_VIDEO_ID_PATHS):
+        video_id = parts.path.split('/', 3)[2]
+    else:
+        return None
+    
+    return video_id if _VIDEO_ID_RE.fullmatch(video_id) else None
+
+def watch_url(video_id):
+    """Return the canonical watch URL for a video id"""
+    return f"https://www.youtube.com/watch?v={video_id}"
+
+def _audio_video_formats(info):
+    """Yield the formats that carry both video and audio"""
+    for f in info.get('formats', ()):
+        if f.get('vcodec') != 'none' and f.get('acodec') != 'none':
+            yield f
+
+def _format_quality(f):
+    """Return the quality label shown for a format"""
+    return f.get('resolution', f.get('format_note', 'Unknown'))
+
+def list_formats(info):
+    """Return up to 20 video-with-audio formats, highest quality first"""
+    # Pick the top 20 before building any dicts; nlargest keeps the order
+    # of equal-quality formats like a stable sort would
+    top = heapq.nlargest(
+        20,
+        _audio_video_formats(info),
+        key=lambda f: quality_sort_key(_format_quality(f))
+    )
+    return [{
+        'format_id': f['format_id'],
+        'quality': _format_quality(f),
+        'ext': f.get('ext', 'mp4'),
+        'filesize': f.get('filesize', 0),
+        'filesize_fmt': format_size(f.get('filesize', 0)),
+        'note': f.get('format_note', '')
+    } for f in top]
+
+def _prune_info_cache(now):
+    """Drop expired entries and keep the cache under its size limit (lock held)"""
+    while info_cache:
+        oldest_id = next(iter(info_cache))
+        if len(info_cache) < INFO_CACHE_MAX_SIZE and now - info_cache[oldest_id][0] < INFO_CACHE_TTL:
+            break
+        del info_cache[oldest_id]
+
+def _lookup_cache_entry(video_id):
+    """Return the cached (timestamp, info, formats) entry if it is still fresh"""
+    with info_cache_lock:
+        entry = info_cache.get(video_id)
+        if entry and time.time() - entry[0] < INFO_CACHE_TTL:
+            return entry
+    return None
+
+def lookup_cached_info(video_id):
+    """Return cached video info if it is still fresh"""
+    entry = _lookup_cache_entry(video_id)
+    return entry[1] if entry else None
+
+def invalidate_cached_info(video_id):
+    """Drop a cached entry, e.g. after its format URLs stopped working"""
+    with info_cache_lock:
+        info_cache.pop(video_id, None)
+
+def fetch_video_info(video_id):
+    """Get video information and its format list, served from the cache when possible"""
+    entry = _lookup_cache_entry(video_id)
+    if entry:
+        return entry[1], entry[2]
+    
+    info = get_video_info_with_retry(watch_url(video_id))
+    if not info:
+        return info, []
+    
+    info = {key: value for key, value in info.items() if key not in _UNCACHED_INFO_KEYS}
+    formats = list_formats(info)
+    now = time.time()
+    with info_cache_lock:
+        # Re-insert so the dict stays ordered oldest first
+        info_cache.pop(video_id, None)
+        _prune_info_cache(now)
+        info_cache[video_id] = (now, info, formats)
+    return info, formats
 
 @app.route("/")
 def home():
@@ -138,9 +474,10 @@ def home():
         "version": "1.0.0",
         "timestamp": datetime.now().isoformat(),
         "endpoints": {
-            "/info": "POST - Get video information",
+            "/info": "POST - Get video information (304 if If-None-Match is still current)",
             "/download": "POST - Start a download",
             "/progress/<id>": "GET - Get download progress",
+            "/progress_stream/<id>": "GET - Stream download progress (Server-Sent Events)",
             "/get_file/<id>": "GET - Download completed file",
             "/cancel/<id>": "POST - Cancel download",
             "/health": "GET - Health check",
@@ -150,6 +487,13 @@ def home():
 
 # ==================== VIDEO INFO ENDPOINTS ====================
 
+def _with_info_cache_headers(response, etag):
+    """Add the validator and freshness headers sent on /info 200s and 304s"""
+    response.set_etag(etag, weak=True)
+    response.cache_control.public = True
+    response.cache_control.max_age = INFO_MAX_AGE
+    return response
+
 @app.route("/info", methods=["POST"])
 @app.route("/get_info", methods=["POST"])
 def get_video_info():
@@ -164,37 +508,22 @@ def get_video_info():
         if not url:
             return jsonify({"error": "Please provide a YouTube URL"}), 400
         
-        # Validate YouTube URL
-        youtube_regex = r'(https?://)?(www\.)?(youtube|youtu|youtube-nocookie)\.(com|be)/'
-        if not re.match(youtube_regex, url):
+        # Validate YouTube URL before spending a yt-dlp call on it
+        video_id = extract_video_id(url)
+        if not video_id:
             return jsonify({"error": "Please enter a valid YouTube URL"}), 400
         
-        # Get video info with retry logic
-        info = get_video_info_with_retry(url)
-        
-        # Extract available formats
-        formats = []
-        for f in info.get('formats', []):
-            if f.get('vcodec') != 'none' and f.get('acodec') != 'none':  # Video with audio
-                format_info = {
-                    'format_id': f['format_id'],
-                    'quality': f.get('resolution', f.get('format_note', 'Unknown')),
-                    'ext': f.get('ext', 'mp4'),
-                    'filesize': f.get('filesize', 0),
-                    'filesize_fmt': format_size(f.get('filesize', 0)),
-                    'note': f.get('format_note', '')
-                }
-                formats.append(format_info)
-        
-        # Sort formats by quality (highest first)
-        try:
-            formats.sort(key=lambda x: (
-                0 if 'p' in str(x['quality']) else 1,
-                int(re.search(r'\d+', str(x['quality'])).group()) if re.search(r'\d+', str(x['quality'])) else 0
-            ), reverse=True)
-        except:
-            # If sorting fails, keep original order
-            pass
+        # The response only depends on the video and the URL echoed back, so
+        # a client holding a matching ETag can reuse its copy while the
+        # server-side cache entry is still fresh. /info is a read-only lookup
+        # that is a POST only to carry the JSON body, so a match deliberately
+        # gets 304 like a GET would, not the 412 RFC 7232 gives for POST.
+        etag = hashlib.md5(f"{video_id}:{url}".encode()).hexdigest()
+        if request.if_none_match.contains_weak(etag) and lookup_cached_info(video_id):
+            return _with_info_cache_headers(app.response_class(status=304), etag)
+        
+        # Get video info and formats (cached, with retry logic)
+        info, formats = fetch_video_info(video_id)
         
         video_info = {
             'success': True,
@@ -205,11 +534,11 @@ def get_video_info():
             'uploader': info.get('uploader', 'Unknown'),
             'view_count': info.get('view_count', 0),
             'like_count': info.get('like_count', 0),
-            'formats': formats[:20],  # Limit to 20 formats
+            'formats': formats,
             'url': url
         }
         
-        return jsonify(video_info)
+        return _with_info_cache_headers(jsonify(video_info), etag)
         
     except Exception as e:
         error_msg = str(e)
@@ -225,151 +554,231 @@ def get_video_info():
 
 # ==================== DOWNLOAD ENDPOINTS ====================
 
+def update_progress(progress, /, **fields):
+    """Apply several progress fields at once so readers never see half an update"""
+    with progress.changed:
+        for name, value in fields.items():
+            setattr(progress, name, value)
+        # Publish a new snapshot rather than mutating the old one, so
+        # lock-free readers always see a complete update
+        progress.snapshot = progress.to_dict()
+        progress.changed.notify_all()
+
 def download_progress_hook(d, download_id):
     """Progress hook for yt-dlp"""
-    if download_id not in active_downloads:
+    with downloads_lock:
+        progress = active_downloads.get(download_id)
+    if progress is None:
         return
     
-    progress = active_downloads[download_id]
-    
     if d['status'] == 'downloading':
-        progress.status = "downloading"
-        progress.current_step = "Downloading video"
+        fields = {
+            'status': "downloading",
+            'current_step': "Downloading video",
+        }
         
         # Calculate progress percentage
         if d.get('total_bytes') and d.get('downloaded_bytes'):
             percent = (d['downloaded_bytes'] / d['total_bytes']) * 100
-            progress.progress = min(90, percent)  # Cap at 90% for download phase
-            progress.size = format_size(d['total_bytes'])
+            fields['progress'] = min(90, percent)  # Cap at 90% for download phase
+            fields['size'] = format_size(d['total_bytes'])
         elif d.get('total_bytes_estimate'):
             percent = (d.get('downloaded_bytes', 0) / d['total_bytes_estimate']) * 100
-            progress.progress = min(90, percent)
-            progress.size = format_size(d['total_bytes_estimate'])
+            fields['progress'] = min(90, percent)
+            fields['size'] = format_size(d['total_bytes_estimate'])
         
         speed = d.get('speed', 0)
         if speed:
-            progress.message = f"Speed: {format_size(speed)}/s"
+            fields['message'] = f"Speed: {format_size(speed)}/s"
+        
+        update_progress(progress, **fields)
     
     elif d['status'] == 'finished':
-        progress.status = "processing"
-        progress.current_step = "Processing video"
-        progress.progress = 95
-        progress.message = "Download complete, finalizing..."
+        update_progress(
+            progress,
+            status="processing",
+            current_step="Processing video",
+            progress=95,
+            message="Download complete, finalizing..."
+        )
+
+def expire_download(download_id):
+    """Forget a finished download and delete its file"""
+    with downloads_lock:
+        progress = active_downloads.pop(download_id, None)
+    if progress and progress.file_path and os.path.exists(progress.file_path):
+        try:
+            os.remove(progress.file_path)
+        except:
+            pass
+
+def schedule_expiry(download_id, delay):
+    """Expire a download after delay seconds"""
+    with cleanup_changed:
+        heapq.heappush(cleanup_heap, (time.monotonic() + delay, download_id))
+        cleanup_changed.notify()
+
+def run_cleanup_scheduler():
+    """Expire downloads as their deadlines pass, in a single background thread"""
+    while True:
+        with cleanup_changed:
+            # Sleep until the earliest deadline, or until a new one is added
+            while not cleanup_heap or cleanup_heap[0][0] > time.monotonic():
+                timeout = cleanup_heap[0][0] - time.monotonic() if cleanup_heap else None
+                cleanup_changed.wait(timeout)
+            _, download_id = heapq.heappop(cleanup_heap)
+        expire_download(download_id)
+
+# Expiries share one thread and a heap of (deadline, download_id) instead
+# of a sleeping thread each
+cleanup_heap = []
+cleanup_changed = threading.Condition()
+threading.Thread(target=run_cleanup_scheduler, name='cleanup', daemon=True).start()
+
+def _is_finished_file(name, download_id):
+    """Whether a temp folder entry is the finished video for a download"""
+    stem, ext = os.path.splitext(name)
+    return stem == download_id and ext in _VIDEO_EXTS
+
+def remove_temp_files(download_id):
+    """Delete everything yt-dlp left in the temp folder for a download"""
+    prefix = f"{download_id}."
+    try:
+        with os.scandir(app.config['TEMP_FOLDER']) as entries:
+            for entry in entries:
+                if entry.name.startswith(prefix):
+                    try:
+                        os.remove(entry.path)
+                    except:
+                        pass
+    except OSError:
+        # The temp folder is gone (e.g. downloads/ was wiped), so nothing is left
+        pass
 
 def download_video_thread(url, quality, download_id, filename=None):
     """Download video in a separate thread"""
+    with downloads_lock:
+        progress = active_downloads.get(download_id)
+        if progress is None:
+            return
+    
+        # Take the cached info off the tracker so it isn't kept alive for the
+        # rest of the download and its expiry
+        cached_info, progress.info = progress.info, None
+        used_cached_info = cached_info is not None
+    
+        # Cancelled while still queued: don't start, just expire it as usual.
+        # Checked under the lock so a cancel can't slip in before "starting".
+        if progress.status == "cancelled":
+            schedule_expiry(download_id, app.config['DOWNLOAD_EXPIRY'])
+            return
+    
+        update_progress(
+            progress,
+            start_time=datetime.now(),
+            status="starting",
+            current_step="Preparing download",
+            message="Initializing download...",
+            progress=5
+        )
+    
     try:
-        progress = active_downloads[download_id]
-        progress.start_time = datetime.now()
-        progress.status = "starting"
-        progress.current_step = "Preparing download"
-        progress.message = "Initializing download..."
-        progress.progress = 5
+        # yt-dlp calls the hook for every chunk; a few updates a second are
+        # all a progress bar needs. Status changes always go through.
+        last_update = [0.0]
+        def throttled_progress_hook(d):
+            now = time.monotonic()
+            if d['status'] == 'downloading' and now - last_update[0] < PROGRESS_UPDATE_INTERVAL:
+                return
+            last_update[0] = now
+            download_progress_hook(d, download_id)
         
-        # Create temp directory for download
-        temp_dir = tempfile.mkdtemp()
-        
-        # Set download options with anti-bot measures
+        # Set download options: the static ones plus this download's own
         ydl_opts = {
+            **_DOWNLOAD_OPTS,
             'format': quality,
-            'outtmpl': os.path.join(temp_dir, '%(title)s.%(ext)s'),
-            'progress_hooks': [lambda d: download_progress_hook(d, download_id)],
-            'quiet': True,
-            'no_warnings': True,
-            'merge_output_format': 'mp4',
-            
-            # Anti-bot measures for download
-            'http_headers': {
-                'User-Agent': get_random_user_agent(),
-                'Accept': '*/*',
-                'Accept-Language': 'en-US,en;q=0.9',
-                'Accept-Encoding': 'gzip, deflate, br',
-                'Connection': 'keep-alive',
-            },
-            
-            'extractor_args': {
-                'youtube': {
-                    'player_client': ['android', 'ios'],
-                    'skip': ['configs', 'hls', 'dash'],
-                    'throttled': False,
-                }
-            },
-            
-            'geo_bypass': True,
-            'geo_bypass_country': 'US',
-            
-            'retries': 15,
-            'fragment_retries': 15,
-            'skip_unavailable_fragments': True,
-            'ignoreerrors': True,
-            
-            'sleep_interval': 2,
-            'max_sleep_interval': 5,
-            'sleep_interval_requests': 3,
+            'outtmpl': os.path.join(app.config['TEMP_FOLDER'], f'{download_id}.%(ext)s'),
+            'progress_hooks': [throttled_progress_hook],
+            'http_headers': build_headers(_DOWNLOAD_HEADERS),
         }
         
         with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            progress.current_step = "Fetching video information"
-            progress.message = "Getting video details..."
-            progress.progress = 10
-            
-            info = ydl.extract_info(url, download=False)
-            progress.title = info.get('title', 'video')
+            update_progress(
+                progress,
+                current_step="Fetching video information",
+                message="Getting video details...",
+                progress=10
+            )
             
-            progress.current_step = "Starting download"
-            progress.message = "Beginning download process..."
-            progress.progress = 15
+            # Reuse info already extracted by /info when available. Cached
+            # info is shared between requests, and sanitize_info sets
+            # defaults on the dict it is given, so hand it a copy.
+            if used_cached_info:
+                info = ydl.sanitize_info(dict(cached_info), remove_private_keys=True)
+                cached_info = None
+            else:
+                info = ydl.extract_info(url, download=False, process=False)
+            update_progress(
+                progress,
+                title=info.get('title', 'video'),
+                current_step="Starting download",
+                message="Beginning download process...",
+                progress=15
+            )
             
-            # Download the video
-            ydl.download([url])
+            # Download the video from the extracted info
+            ydl.process_ie_result(info, download=True)
         
-        # Find downloaded file
-        files = [f for f in os.listdir(temp_dir) if f.endswith(('.mp4', '.mkv', '.webm'))]
-        if not files:
+        # Find downloaded file (<download_id>.<ext>, not a leftover .fNNN part)
+        with os.scandir(app.config['TEMP_FOLDER']) as entries:
+            source_file = next((
+                entry.path for entry in entries
+                if entry.is_file() and _is_finished_file(entry.name, download_id)
+            ), None)
+        if source_file is None:
             raise Exception("No video file found after download")
         
-        source_file = os.path.join(temp_dir, files[0])
-        
         # Create safe filename
-        safe_title = re.sub(r'[^\w\s-]', '', progress.title).strip()
-        safe_title = re.sub(r'[-\s]+', '-', safe_title)
+        safe_title = _UNSAFE_RE.sub('', progress.title).strip()
+        safe_title = _WS_RE.sub('-', safe_title)
         final_filename = f"{safe_title}_{download_id}.mp4"
         final_path = os.path.join(app.config['DOWNLOAD_FOLDER'], final_filename)
         
         # Move file to downloads folder
-        shutil.move(source_file, final_path)
+        os.replace(source_file, final_path)
         
         # Update progress
-        progress.status = "completed"
-        progress.progress = 100
-        progress.current_step = "Download complete"
-        progress.message = "Video ready for download"
-        progress.file_path = final_path
-        progress.size = format_size(os.path.getsize(final_path))
-        
-        # Cleanup temp directory
-        shutil.rmtree(temp_dir)
+        update_progress(
+            progress,
+            status="completed",
+            progress=100,
+            current_step="Download complete",
+            message="Video ready for download",
+            file_path=final_path,
+            size=format_size(os.path.getsize(final_path))
+        )
         
     except Exception as e:
-        if download_id in active_downloads:
-            active_downloads[download_id].status = "error"
-            active_downloads[download_id].error = str(e)
-            active_downloads[download_id].message = f"Error: {str(e)}"
+        # Cached info may hold expired format URLs; don't hand it out again
+        if used_cached_info:
+            invalidate_cached_info(extract_video_id(url))
+        
+        with downloads_lock:
+            if download_id in active_downloads:
+                update_progress(
+                    active_downloads[download_id],
+                    status="error",
+                    error=str(e),
+                    message=f"Error: {str(e)}"
+                )
     
     finally:
-        # Cleanup after 5 minutes
-        def cleanup():
-            time.sleep(300)
-            if download_id in active_downloads:
-                progress = active_downloads[download_id]
-                if progress.file_path and os.path.exists(progress.file_path):
-                    try:
-                        os.remove(progress.file_path)
-                    except:
-                        pass
-                del active_downloads[download_id]
+        # Cleanup after 5 minutes. Scheduled first so the entry can't stay
+        # tracked forever if removing the temp files fails.
+        schedule_expiry(download_id, app.config['DOWNLOAD_EXPIRY'])
         
-        threading.Thread(target=cleanup).start()
+        # Remove partial and intermediate files, even when the download failed
+        remove_temp_files(download_id)
 
 @app.route("/download", methods=["POST"])
 @app.route("/start_download", methods=["POST"])
@@ -387,21 +796,25 @@ def start_download():
         if not url:
             return jsonify({"success": False, "error": "URL is required"}), 400
         
+        video_id = extract_video_id(url)
+        if not video_id:
+            return jsonify({"success": False, "error": "Please enter a valid YouTube URL"}), 400
+        
         # Generate unique download ID
         import uuid
         download_id = str(uuid.uuid4())[:8]
         
         # Create progress tracker
-        progress = DownloadProgress()
-        active_downloads[download_id] = progress
+        progress = DownloadProgress(download_id)
+        progress.info = lookup_cached_info(video_id)
+        with downloads_lock:
+            # Bound memory: finished entries expire, new ones wait for room
+            if len(active_downloads) >= app.config['MAX_TRACKED_DOWNLOADS']:
+                return jsonify({"success": False, "error": "Server is busy, please try again later"}), 503
+            active_downloads[download_id] = progress
         
-        # Start download in background thread
-        thread = threading.Thread(
-            target=download_video_thread,
-            args=(url, quality, download_id)
-        )
-        thread.daemon = True
-        thread.start()
+        # Queue download on the worker pool
+        download_executor.submit(download_video_thread, watch_url(video_id), quality, download_id)
         
         return jsonify({
             "success": True,
@@ -412,64 +825,107 @@ def start_download():
     except Exception as e:
         return jsonify({"success": False, "error": f"Failed to start download: {str(e)}"}), 500
 
-@app.route("/progress/<download_id>")
-def get_progress(download_id):
-    """Get current download progress"""
-    if download_id not in active_downloads:
-        return jsonify({
+def progress_snapshot(download_id):
+    """Return the current progress of a download as a dict (treat as read-only)"""
+    # No lock needed: dict lookups and attribute reads are atomic, and
+    # update_progress replaces the snapshot whole instead of editing it
+    progress = active_downloads.get(download_id)
+    if progress is None:
+        return {
             "status": "not_found",
             "progress": 0,
             "message": "Download not found"
-        }), 404
-    
-    progress = active_downloads[download_id]
-    
-    progress_data = {
-        "status": progress.status,
-        "progress": progress.progress,
-        "message": progress.message,
-        "current_step": progress.current_step,
-        "title": progress.title,
-        "size": progress.size,
-        "error": progress.error,
-        "download_id": download_id
-    }
+        }
     
-    if progress.status in ["completed", "error"]:
-        progress_data["file_path"] = progress.file_path
+    return progress.snapshot
+
+def progress_events(download_id):
+    """Yield a server-sent event each time a download's progress changes"""
+    with downloads_lock:
+        progress = active_downloads.get(download_id)
+    
+    last_data = None
+    while True:
+        with downloads_lock:
+            data = progress_snapshot(download_id)
+            # Only this download's updates wake the stream; an unknown id
+            # sends "not_found" right away and never waits
+            while data == last_data:
+                if not progress.changed.wait(timeout=15):
+                    break
+                data = progress_snapshot(download_id)
+        
+        if data == last_data:
+            # Nothing changed for a while; a comment keeps proxies from
+            # closing the idle connection
+            yield ": keep-alive\n\n"
+            continue
+        
+        last_data = data
+        yield f"data: {app.json.dumps(data)}\n\n"
+        
+        if data["status"] in FINAL_STATUSES:
+            return
+
+@app.route("/progress/<download_id>")
+def get_progress(download_id):
+    """Get current download progress"""
+    progress_data = progress_snapshot(download_id)
+    if progress_data["status"] == "not_found":
+        return jsonify(progress_data), 404
     
     return jsonify(progress_data)
 
+@app.route("/progress_stream/<download_id>")
+def stream_progress(download_id):
+    """Push download progress as Server-Sent Events instead of polling"""
+    return Response(
+        progress_events(download_id),
+        mimetype="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",  # Disable proxy buffering
+        }
+    )
+
 @app.route("/get_file/<download_id>")
 @app.route("/download_file/<download_id>")
 def get_file(download_id):
     """Download the completed file"""
-    if download_id not in active_downloads:
+    progress_data = progress_snapshot(download_id)
+    if progress_data["status"] == "not_found":
         return jsonify({"error": "Download not found or expired"}), 404
     
-    progress = active_downloads[download_id]
+    status, file_path, title = progress_data["status"], progress_data.get("file_path"), progress_data["title"]
     
-    if progress.status != "completed" or not progress.file_path:
+    if status != "completed" or not file_path:
         return jsonify({"error": "File not ready for download"}), 400
     
-    if not os.path.exists(progress.file_path):
+    if not os.path.exists(file_path):
         return jsonify({"error": "File not found"}), 404
     
-    # Send file for download
+    # Send file for download; conditional and etag enable Range and
+    # If-None-Match requests so interrupted downloads can resume
     return send_file(
-        progress.file_path,
+        file_path,
         as_attachment=True,
-        download_name=f"{progress.title}.mp4"
+        download_name=f"{title}.mp4",
+        conditional=True,
+        etag=True
     )
 
 @app.route("/cancel/<download_id>", methods=["POST"])
 @app.route("/cancel_download/<download_id>", methods=["POST"])
 def cancel_download(download_id):
     """Cancel an ongoing download"""
-    if download_id in active_downloads:
-        active_downloads[download_id].status = "cancelled"
-        active_downloads[download_id].message = "Download cancelled"
-        return jsonify({"success": True, "message": "Download cancelled"})
+    with downloads_lock:
+        if download_id in active_downloads:
+            update_progress(
+                active_downloads[download_id],
+                status="cancelled",
+                message="Download cancelled"
+            )
+            return jsonify({"success": True, "message": "Download cancelled"})
     
     return jsonify({"error": "Download not found"}), 404
 
@@ -478,10 +934,13 @@ def cancel_download(download_id):
 @app.route("/health")
 def health_check():
     """Health check endpoint"""
+    with downloads_lock:
+        downloading = len([p for p in active_downloads.values() if p.status == "downloading"])
+    
     return jsonify({
         "status": "ok",
         "timestamp": datetime.now().isoformat(),
-        "active_downloads": len([p for p in active_downloads.values() if p.status == "downloading"])
+        "active_downloads": downloading
     })
 
 @app.route("/cleanup", methods=["POST"])
@@ -491,23 +950,24 @@ def cleanup():
         now = time.time()
         cleaned = 0
         
-        for download_id in list(active_downloads.keys()):
-            progress = active_downloads[download_id]
-            
-            # Clean up old downloads (older than 1 hour)
-            if progress.start_time and (now - progress.start_time.timestamp() > 3600):
-                if progress.file_path and os.path.exists(progress.file_path):
-                    try:
-                        os.remove(progress.file_path)
-                    except:
-                        pass
-                del active_downloads[download_id]
-                cleaned += 1
+        with downloads_lock:
+            expired = [
+                download_id for download_id, progress in active_downloads.items()
+                # Clean up old downloads (older than 1 hour)
+                if progress.start_time and (now - progress.start_time.timestamp() > 3600)
+            ]
+        
+        for download_id in expired:
+            expire_download(download_id)
+            cleaned += 1
+        
+        with downloads_lock:
+            remaining = len(active_downloads)
         
         return jsonify({
             "success": True,
             "cleaned": cleaned,
-            "remaining": len(active_downloads)
+            "remaining": remaining
         })
         
     except Exception as e:
@@ -0,0 +1,170 @@
+import shutil
+import threading
+import time
+
+import pytest
+import yt_dlp
+
+import app
+
+VIDEO_URL = app.watch_url('dQw4w9WgXcQ')
+
+
+class FailingYoutubeDL:
+    """Stand-in for yt_dlp.YoutubeDL whose extraction always fails"""
+
+    def __init__(self, opts):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def extract_info(self, url, download=False, process=True):
+        raise yt_dlp.utils.DownloadError('boom')
+
+
+class CachedInfoYoutubeDL(FailingYoutubeDL):
+    """Stand-in that accepts cached info but fails to download it"""
+
+    def sanitize_info(self, info, remove_private_keys=False):
+        return info
+
+    def process_ie_result(self, info, download=True):
+        raise yt_dlp.utils.DownloadError('expired format URL')
+
+
+@pytest.fixture
+def download_folders(tmp_path, monkeypatch):
+    temp_folder = tmp_path / '.tmp'
+    temp_folder.mkdir()
+    monkeypatch.setitem(app.app.config, 'DOWNLOAD_FOLDER', str(tmp_path))
+    monkeypatch.setitem(app.app.config, 'TEMP_FOLDER', str(temp_folder))
+    monkeypatch.setitem(app.app.config, 'DOWNLOAD_EXPIRY', 0.1)
+    yield temp_folder
+    with app.downloads_lock:
+        app.active_downloads.clear()
+
+
+def track(download_id):
+    progress = app.DownloadProgress(download_id)
+    with app.downloads_lock:
+        app.active_downloads[download_id] = progress
+    return progress
+
+
+def wait_for(predicate, timeout=2):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+def test_failed_download_expires_without_temp_folder(download_folders, monkeypatch):
+    monkeypatch.setattr(yt_dlp, 'YoutubeDL', FailingYoutubeDL)
+    progress = track('missing-tmp')
+    shutil.rmtree(download_folders)
+
+    app.download_video_thread(VIDEO_URL, 'best', 'missing-tmp')
+
+    assert progress.status == "error"
+    assert wait_for(lambda: 'missing-tmp' not in app.active_downloads)
+
+
+def test_cached_info_is_released_and_evicted_on_failure(download_folders, monkeypatch):
+    monkeypatch.setattr(yt_dlp, 'YoutubeDL', CachedInfoYoutubeDL)
+    video_id = app.extract_video_id(VIDEO_URL)
+    info = {'id': video_id, 'title': 'Cached', 'formats': []}
+    monkeypatch.setitem(app.info_cache, video_id, (time.time(), info, []))
+    progress = track('cached-info')
+    progress.info = app.lookup_cached_info(video_id)
+
+    app.download_video_thread(VIDEO_URL, 'best', 'cached-info')
+
+    assert progress.status == "error"
+    assert progress.info is None
+    assert video_id not in app.info_cache
+
+
+@pytest.fixture
+def expired(monkeypatch):
+    """Record the ids the cleanup thread expires, in order"""
+    # Drop expiries left behind by earlier tests
+    with app.cleanup_changed:
+        app.cleanup_heap.clear()
+    expired_ids = []
+    expire_download = app.expire_download
+
+    def recording_expire(download_id):
+        expire_download(download_id)
+        expired_ids.append(download_id)
+
+    monkeypatch.setattr(app, 'expire_download', recording_expire)
+    yield expired_ids
+    with app.cleanup_changed:
+        app.cleanup_heap.clear()
+
+
+def test_expiries_run_in_deadline_order(expired):
+    app.schedule_expiry('third', 0.15)
+    app.schedule_expiry('first', 0.05)
+    app.schedule_expiry('second', 0.1)
+
+    assert wait_for(lambda: len(expired) == 3)
+    assert expired == ['first', 'second', 'third']
+
+
+def test_earlier_deadline_wakes_the_scheduler(expired):
+    app.schedule_expiry('late', 60)
+    # Let the cleanup thread go back to sleeping until the late deadline
+    time.sleep(0.05)
+    app.schedule_expiry('early', 0.05)
+
+    assert wait_for(lambda: expired == ['early'], timeout=1)
+
+
+def test_expiry_removes_entry_and_file(tmp_path, expired):
+    file_path = tmp_path / 'video.mp4'
+    file_path.write_bytes(b'video')
+    progress = track('finished')
+    progress.file_path = str(file_path)
+
+    app.schedule_expiry('finished', 0)
+
+    assert wait_for(lambda: expired == ['finished'])
+    assert 'finished' not in app.active_downloads
+    assert not file_path.exists()
+
+
+def test_download_cancelled_while_queued_never_starts(download_folders, monkeypatch):
+    monkeypatch.setattr(yt_dlp, 'YoutubeDL', FailingYoutubeDL)
+    statuses = []
+    update_progress = app.update_progress
+
+    def recording_update(progress, /, **fields):
+        statuses.append(fields.get('status'))
+        update_progress(progress, **fields)
+
+    monkeypatch.setattr(app, 'update_progress', recording_update)
+    client = app.app.test_client()
+
+    # Occupy every worker so the new download has to wait as "pending"
+    gate = threading.Event()
+    blockers = [
+        app.download_executor.submit(gate.wait, 5)
+        for _ in range(app.app.config['MAX_CONCURRENT_DOWNLOADS'])
+    ]
+    try:
+        download_id = client.post('/download', json={'url': VIDEO_URL}).json['download_id']
+        assert client.post(f'/cancel/{download_id}').status_code == 200
+    finally:
+        gate.set()
+    for blocker in blockers:
+        blocker.result()
+
+    assert wait_for(lambda: download_id not in app.active_downloads)
+    assert "starting" not in statuses
@@ -0,0 +1,49 @@
+import pytest
+
+from app import extract_video_id
+
+VIDEO_ID = 'dQw4w9WgXcQ'
+
+
+@pytest.mark.parametrize('url', [
+    f'https://www.youtube.com/watch?v={VIDEO_ID}',
+    f'https://youtube.com/watch?v={VIDEO_ID}&t=42s',
+    f'http://m.youtube.com/watch?feature=share&v={VIDEO_ID}',
+    f'https://music.youtube.com/watch?v={VIDEO_ID}',
+    f'www.youtube.com/watch?v={VIDEO_ID}',
+    f'https://youtu.be/{VIDEO_ID}',
+    f'https://youtu.be/{VIDEO_ID}?si=abc',
+    f'youtu.be/{VIDEO_ID}',
+    f'https://www.youtube.com/shorts/{VIDEO_ID}',
+    f'https://www.youtube.com/embed/{VIDEO_ID}?start=10',
+    f'https://www.youtube.com/live/{VIDEO_ID}',
+    f'https://www.youtube.com/v/{VIDEO_ID}',
+    f'https://www.youtube-nocookie.com/embed/{VIDEO_ID}',
+])
+def test_accepts_video_urls(url):
+    assert extract_video_id(url) == VIDEO_ID
+
+
+@pytest.mark.parametrize('url', [
+    '',
+    'not a url',
+    'https://evil.com/watch?v=dQw4w9WgXcQ',
+    'https://youtube.com.evil.com/watch?v=dQw4w9WgXcQ',
+    'https://[::1/watch',
+    'youtu.be',
+    'https://youtu.be',
+    'https://youtu.be/',
+    'youtu.be?v=dQw4w9WgXcQ',
+    'https://youtu.be/short',
+    'https://www.youtube.com',
+    'https://www.youtube.com/watch',
+    'https://www.youtube.com/watch?v=',
+    'https://www.youtube.com/watch?v=dQw4w9WgXcQextra',
+    'https://www.youtube.com/shorts',
+    'https://www.youtube.com/shorts/',
+    'https://www.youtube.com/embed/',
+    'https://www.youtube.com/playlist?list=PL123',
+    'https://www.youtube.com/@channel',
+])
+def test_rejects_other_urls(url):
+    assert extract_video_id(url) is None
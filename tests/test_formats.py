@@ -0,0 +1,101 @@
+import pytest
+
+from app import format_size, list_formats
+
+
+@pytest.mark.parametrize('size, expected', [
+    (None, '0 B'),
+    (0, '0 B'),
+    (0.5, '0.50 B'),
+    (1023, '1023.00 B'),
+    # Rounds up in the display but is still below one KB
+    (1023.999, '1024.00 B'),
+    (1024, '1.00 KB'),
+    (1536, '1.50 KB'),
+    (1024 ** 2, '1.00 MB'),
+    (1024 ** 3, '1.00 GB'),
+    (1024 ** 4 - 1, '1024.00 GB'),
+    (1024 ** 4, '1.00 TB'),
+    # TB is the largest unit
+    (1024 ** 5, '1024.00 TB'),
+    (1024 ** 6, '1048576.00 TB'),
+])
+def test_format_size(size, expected):
+    assert format_size(size) == expected
+
+
+def fmt(format_id, quality, vcodec='avc1', acodec='mp4a', **fields):
+    return {'format_id': format_id, 'resolution': quality, 'vcodec': vcodec, 'acodec': acodec, **fields}
+
+
+def ids(formats):
+    return [f['format_id'] for f in formats]
+
+
+def test_list_formats_keeps_only_video_with_audio():
+    info = {'formats': [
+        fmt('137', '1920x1080', acodec='none'),
+        fmt('140', 'audio only', vcodec='none'),
+        fmt('18', '640x360'),
+        # Missing codec fields count as present, as yt-dlp leaves them unknown
+        {'format_id': 'sb0', 'resolution': '320x180'},
+    ]}
+
+    assert ids(list_formats(info)) == ['18', 'sb0']
+
+
+def test_list_formats_orders_highest_quality_first():
+    info = {'formats': [
+        fmt('a', '360p'),
+        fmt('b', '640x360'),
+        fmt('c', '720p'),
+        fmt('d', '1280x720'),
+        fmt('e', 'Unknown'),
+    ]}
+
+    # Labels without a "p" sort above "NNNp" labels, then by their number
+    assert ids(list_formats(info)) == ['d', 'b', 'e', 'c', 'a']
+
+
+def test_list_formats_keeps_input_order_for_equal_quality():
+    info = {'formats': [
+        fmt('first', '720p'),
+        fmt('low', '360p'),
+        fmt('second', '720p'),
+        fmt('third', '720p'),
+    ]}
+
+    assert ids(list_formats(info)) == ['first', 'second', 'third', 'low']
+
+
+def test_list_formats_returns_top_20():
+    info = {'formats': [fmt(str(height), f'{height}p') for height in range(1, 26)]}
+
+    assert ids(list_formats(info)) == [str(height) for height in range(25, 5, -1)]
+
+
+def test_list_formats_fields():
+    info = {'formats': [
+        {'format_id': '22', 'ext': 'webm', 'filesize': 1536, 'format_note': '720p'},
+        {'format_id': '18'},
+    ]}
+
+    assert list_formats(info) == [
+        {
+            'format_id': '18',
+            'quality': 'Unknown',
+            'ext': 'mp4',
+            'filesize': 0,
+            'filesize_fmt': '0 B',
+            'note': '',
+        },
+        {
+            # Falls back to the format note without a resolution
+            'format_id': '22',
+            'quality': '720p',
+            'ext': 'webm',
+            'filesize': 1536,
+            'filesize_fmt': '1.50 KB',
+            'note': '720p',
+        },
+    ]
@@ -0,0 +1,72 @@
+import pytest
+
+import app
+
+VIDEO_ID = 'dQw4w9WgXcQ'
+URL = f'https://youtu.be/{VIDEO_ID}'
+
+
+@pytest.fixture
+def extractions(monkeypatch):
+    """Stub the yt-dlp race with an empty cache, recording each extraction"""
+    urls = []
+
+    def fake_race(url):
+        urls.append(url)
+        return {'title': 'Test Video', 'duration': 61, 'formats': []}
+
+    monkeypatch.setattr(app, '_race_info_clients', fake_race)
+    monkeypatch.setattr(app, 'info_cache', {})
+    return urls
+
+
+@pytest.fixture
+def client():
+    return app.app.test_client()
+
+
+def test_info_sets_etag_and_cache_control(extractions, client):
+    response = client.post('/info', json={'url': URL})
+
+    assert response.status_code == 200
+    assert response.json['title'] == 'Test Video'
+    assert response.headers['ETag'].startswith('W/"')
+    assert response.headers['Cache-Control'] == f'public, max-age={app.INFO_MAX_AGE}'
+
+
+def test_matching_etag_gets_304_while_cached(extractions, client):
+    etag = client.post('/info', json={'url': URL}).headers['ETag']
+
+    response = client.post('/info', json={'url': URL}, headers={'If-None-Match': etag})
+
+    assert response.status_code == 304
+    assert response.data == b''
+    assert response.headers['ETag'] == etag
+    assert response.headers['Cache-Control'] == f'public, max-age={app.INFO_MAX_AGE}'
+    assert len(extractions) == 1
+
+
+def test_matching_etag_gets_200_once_cache_expired(extractions, client):
+    etag = client.post('/info', json={'url': URL}).headers['ETag']
+    cached_at, info, formats = app.info_cache[VIDEO_ID]
+    app.info_cache[VIDEO_ID] = (cached_at - app.INFO_CACHE_TTL, info, formats)
+
+    response = client.post('/info', json={'url': URL}, headers={'If-None-Match': etag})
+
+    assert response.status_code == 200
+    assert response.json['title'] == 'Test Video'
+    assert response.headers['ETag'] == etag
+    assert len(extractions) == 2
+
+
+def test_etag_depends_on_url(extractions, client):
+    etag = client.post('/info', json={'url': URL}).headers['ETag']
+
+    response = client.post(
+        '/info',
+        json={'url': f'https://www.youtube.com/watch?v={VIDEO_ID}'},
+        headers={'If-None-Match': etag}
+    )
+
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
@@ -0,0 +1,107 @@
+import queue
+import threading
+import time
+
+import pytest
+import yt_dlp
+
+import app
+
+URL = app.watch_url('dQw4w9WgXcQ')
+HEDGE_DELAY = 0.05
+
+
+class FakeYoutubeDL:
+    """Stand-in for yt_dlp.YoutubeDL that runs its configuration's behaviour"""
+
+    def __init__(self, opts):
+        self.behaviour = opts['behaviour']
+
+    def extract_info(self, url, download=False):
+        return self.behaviour(url)
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def use_configs(monkeypatch):
+    """Replace the info configurations with fake behaviours, in order"""
+    monkeypatch.setattr(yt_dlp, 'YoutubeDL', FakeYoutubeDL)
+    monkeypatch.setattr(app, 'INFO_HEDGE_DELAY', HEDGE_DELAY)
+
+    def configure(*behaviours):
+        monkeypatch.setattr(app, 'INFO_CONFIGS', [{'behaviour': b} for b in behaviours])
+        monkeypatch.setattr(app, 'YDL_POOL', [
+            queue.LifoQueue(maxsize=app.INFO_CLIENTS_PER_CONFIG) for _ in behaviours
+        ])
+
+    return configure
+
+
+@pytest.fixture
+def release():
+    """Event that lets slow fake extractions finish once the test is done"""
+    event = threading.Event()
+    yield event
+    event.set()
+
+
+def returning(info, started):
+    def behaviour(url):
+        started.append(time.monotonic())
+        return info
+    return behaviour
+
+
+def raising(error):
+    def behaviour(url):
+        raise error
+    return behaviour
+
+
+def test_next_config_starts_after_hedge_delay(use_configs, release):
+    slow_started, fast_started = [], []
+
+    def slow(url):
+        slow_started.append(time.monotonic())
+        release.wait(2)
+        return {'title': 'slow'}
+
+    use_configs(slow, returning({'title': 'fast'}, fast_started))
+
+    assert app._race_info_clients(URL) == {'title': 'fast'}
+    assert fast_started[0] - slow_started[0] >= HEDGE_DELAY
+
+
+def test_failure_starts_next_config_at_once(use_configs, monkeypatch):
+    monkeypatch.setattr(app, 'INFO_HEDGE_DELAY', 5)
+    use_configs(raising(yt_dlp.utils.DownloadError('broken')), returning({'title': 'ok'}, []))
+
+    start = time.monotonic()
+    assert app._race_info_clients(URL) == {'title': 'ok'}
+    assert time.monotonic() - start < 1
+
+
+def test_rate_limit_is_reported_over_other_errors(use_configs):
+    use_configs(
+        raising(yt_dlp.utils.DownloadError('other failure')),
+        raising(yt_dlp.utils.DownloadError('HTTP Error 429: Too Many Requests')),
+        raising(yt_dlp.utils.DownloadError('another failure')),
+    )
+
+    with pytest.raises(yt_dlp.utils.DownloadError) as excinfo:
+        app._race_info_clients(URL)
+    assert app.is_rate_limited(excinfo.value)
+
+
+def test_finished_race_skips_extraction(use_configs):
+    started = []
+    use_configs(returning({'title': 'late'}, started))
+    finished = threading.Event()
+    finished.set()
+
+    assert app._extract_with_client(0, URL, finished) is None
+    assert started == []
+    # The client still goes back to the pool for the next request
+    assert app.YDL_POOL[0].qsize() == 1